@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for the NLP service
+Run from the repository root with: gunicorn -c ml-service/gunicorn.conf.py nlp_service:app
+"""
+
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = f"0.0.0.0:{os.getenv('ML_SERVICE_PORT', '5000')}"
+
+# The app is ASGI (Quart), so each worker runs its own uvicorn event loop.
+# The worker class lives in the uvicorn-worker package; uvicorn.workers is deprecated
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.getenv('ML_SERVICE_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Load the model once in the master and fork afterwards, so every worker
+# shares the same (memory-mapped) classifier and vectorizer pages
+preload_app = True
+
+timeout = 30
+graceful_timeout = 10
+keepalive = 5
@@ -4,145 +4,403 @@ NLP Service for Yuki Chatbot
 Integrates the trained intent classification model with API tool calling
 """
 
-import pickle
+import asyncio
+import functools
 import json
 import re
 import sys
 import os
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import requests
-from datetime import datetime
+import time
+import joblib
+import numpy as np
+import httpx
+from cachetools import LRUCache, TTLCache
+import orjson
+from quart import Quart, request
+from quart_cors import cors
 
-app = Flask(__name__)
-CORS(app)
+app = Quart(__name__)
+app = cors(app, allow_origin="*")
+
+# Intent micro-batching: concurrent /predict calls that miss the cache within this
+# window (seconds) are vectorized and scored together; a full batch flushes early
+_INTENT_BATCH_WINDOW = 0.005
+_INTENT_BATCH_MAX = 64
+
+# Entity patterns, compiled once and applied in a single scan per message
+_ENTITY_RE = re.compile(
+    r'(?P<pcode>\b(?:ss\d{2,3}|b\d{2,3}|h\d{1,2}m?)\b)'  # SS122, B123, H12M
+    r'|(?P<phone>\b01[3-9]\d{8}\b)'                      # Bangladesh mobile numbers
+    r'|(?P<order>\b\d{4,10}\b)',                         # Order numbers (4-10 digits)
+    re.I
+)
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Colour and size vocabularies, matched against whole tokens
+_COLORS = frozenset([
+    'red', 'blue', 'green', 'black', 'white', 'yellow', 'pink', 'purple', 'brown',
+    'gray', 'grey', 'orange', 'navy', 'maroon', 'gold', 'silver', 'beige', 'cream'
+])
+_SIZES = frozenset([
+    'xs', 'small', 's', 'medium', 'm', 'large', 'l', 'xl', 'xxl', '2xl', '3xl',
+    '36', '37', '38', '39', '40', '41', '42'
+])
+
+# Words that never make useful search terms
+_STOPWORDS = frozenset([
+    'search', 'find', 'show', 'get', 'is', 'are', 'the', 'a', 'an', 'for',
+    'available', 'i', 'want', 'need', 'looking', 'product', 'item', 'buy', 'purchase'
+])
+
+# Token -> kind lookup table, so each token is classified with a single dict probe
+_COLOR, _SIZE, _STOPWORD = range(3)
+_TOKEN_KINDS = {
+    **dict.fromkeys(_COLORS, _COLOR),
+    **dict.fromkeys(_SIZES, _SIZE),
+    **dict.fromkeys(_STOPWORDS, _STOPWORD),
+}
+
+# Static replies, shared by every turn and session instead of rebuilt per request (read-only)
+_GREETING_REPLY = {
+    "type": "text",
+    "content": "Hello! I'm your shopping assistant. I can help you with product searches, stock availability, price inquiries, order tracking, and product variants. How can I help you today?"
+}
+_NO_PRODUCTS_REPLY = {
+    "type": "text",
+    "content": "No products found matching your search. Try different keywords or browse our categories."
+}
+_ORDER_INFO_REPLY = {
+    "type": "text",
+    "content": "Please provide your order number or phone number to track your order."
+}
+_PHONE_NUMBER_REPLY = {
+    "type": "text",
+    "content": "Please provide your phone number to find your orders. Example: 01712345678"
+}
+_NO_PRODUCT_SELECTED_REPLY = {
+    "type": "text",
+    "content": "Please search for a specific product first to see variants."
+}
+_HELP_REPLY = {
+    "type": "text",
+    "content": "I'm here to help! I can search products, check stock, provide pricing information, and track orders. What would you like to know?"
+}
+
+# Follow-up suggestions per intent. They never change, so they are built once
+_SUGGESTIONS = {
+    "greeting": ("Search for women shoes", "Show me hijabs", "Track my order", "What's available in bags?"),
+    "product_search": ("Show me more products", "Filter by color", "Filter by price range", "Show product details"),
+    "stock_inquiry": ("Check other products", "Show available items", "Filter by availability", "Browse categories"),
+    "price_inquiry": ("Show price ranges", "Filter by budget", "Show affordable options", "Compare products"),
+    "order_status": ("Track with order number", "Find orders by phone", "Check recent orders", "Order history"),
+    "order_status_phone": ("Show recent orders", "Track latest order", "Order history", "Delivery updates"),
+    "show_variants": ("Show size chart", "Available colors", "Compare styles", "Filter by size"),
+    "show_variants_color": ("Show size chart", "Filter by size", "Compare styles", "Show other colors"),
+    "show_variants_size": ("Available colors", "Show size chart", "Compare styles", "Filter by color"),
+    "provide_phone_number": ("Track my order", "Show my recent orders", "Order history", "Find orders by phone"),
+    "general": ("Search for products", "Track my order", "Show me categories", "Help with shopping"),
+}
+
+# Suggestions that mention an entity: intent -> (entity key, templates with "{0}" for its value)
+_ENTITY_SUGGESTIONS = {
+    "product_search": ("productCode", (
+        "Show colors for {0}", "Is {0} in stock?", "Price of {0}", "What sizes for {0}?"
+    )),
+    "stock_inquiry": ("productCode", (
+        "Price of {0}", "Show variants for {0}", "Add {0} to cart", "Show similar products"
+    )),
+    "price_inquiry": ("productCode", (
+        "Is {0} in stock?", "Show colors for {0}", "Add {0} to cart", "Compare prices"
+    )),
+    "order_status": ("orderNumber", (
+        "Track order {0}", "When will it arrive?", "Change delivery address", "Cancel order"
+    )),
+    "show_variants": ("productCode", (
+        "Is {0} available in red?", "Show {0} in medium", "Compare {0} colors", "Size chart for {0}"
+    )),
+}
+
+@functools.lru_cache(maxsize=4096)
+def _extract_entities_cached(text_lower):
+    """Extract entities from normalized text as a hashable tuple of (key, value) pairs"""
+    entities = {}
+    
+    # Extract product codes, order numbers and phone numbers in one pass,
+    # keeping the first match of each kind
+    for match in _ENTITY_RE.finditer(text_lower):
+        kind = match.lastgroup
+        if kind == 'pcode':
+            entities.setdefault('productCode', match.group().upper())
+        elif kind == 'phone':
+            entities.setdefault('phoneNumber', match.group())
+        else:
+            entities.setdefault('orderNumber', match.group())
+    
+    # Walk the tokens once, collecting colours, sizes and search terms together
+    found = ([], [])  # colours, sizes
+    search_terms = []
+    for word in _WORD_RE.findall(text_lower):
+        kind = _TOKEN_KINDS.get(word)
+        if kind == _STOPWORD:
+            continue
+        if kind is not None and word not in found[kind]:
+            found[kind].append(word)
+        if len(word) > 1 and len(search_terms) < 3:  # Limit to 3 terms
+            search_terms.append(word)
+    
+    found_colors, found_sizes = found
+    if found_colors:
+        entities['colors'] = found_colors
+    if found_sizes:
+        entities['sizes'] = found_sizes
+    
+    # Extract search terms (clean up common words)
+    if entities.get('productCode'):
+        entities['searchTerms'] = [entities['productCode']]
+    elif search_terms:
+        entities['searchTerms'] = search_terms
+    
+    return tuple(
+        (key, tuple(value) if isinstance(value, list) else value)
+        for key, value in entities.items()
+    )
+
+def _entities_from_items(items):
+    """Turn cached entity pairs back into a dict with fresh lists callers can mutate"""
+    return {key: list(value) if isinstance(value, tuple) else value for key, value in items}
+
+# Formatted "YYYY-MM-DDTHH:MM:SS" for the current second, reused until it ticks over
+_last_ts = [0, ""]
+
+def _iso_now():
+    """UTC ISO-8601 timestamp with microseconds, formatting the date part once per second"""
+    t = time.time()
+    second = int(t)
+    if second != _last_ts[0]:
+        _last_ts[:] = [second, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))]
+    return f"{_last_ts[1]}.{int((t - second) * 1e6):06d}Z"
 
 class NLPService:
-    def __init__(self, model_path='model.pkl', vectorizer_path='vectorizer.pkl'):
+    def __init__(self, model_path='model.pkl', vectorizer_path='vectorizer.pkl',
+                 pipeline_path='pipeline.pkl'):
         """Initialize the NLP service with trained model and vectorizer"""
         try:
             # Get the directory of this script to find model files
             script_dir = os.path.dirname(os.path.abspath(__file__))
             model_path = os.path.join(script_dir, model_path)
             vectorizer_path = os.path.join(script_dir, vectorizer_path)
+            pipeline_path = os.path.join(script_dir, pipeline_path)
+            
+            # Load trained model and vectorizer. Artifacts re-saved with
+            # resave_models.py have their arrays memory-mapped read-only, so
+            # forked workers share the same pages instead of private copies
+            if os.path.exists(pipeline_path):
+                # Hashing pipeline from train_pipeline.py: stateless vectorizer
+                # steps followed by the classifier, no vocabulary to load
+                pipeline = joblib.load(pipeline_path, mmap_mode='r')
+                self.vectorizer = pipeline[:-1]
+                self.classifier = pipeline[-1]
+            else:
+                self.classifier = joblib.load(model_path, mmap_mode='r')
+                self.vectorizer = joblib.load(vectorizer_path, mmap_mode='r')
+            self._classes = self.classifier.classes_
+            
+            # Linear models (LogisticRegression, LinearSVC, ...) can be scored from
+            # their margins alone; calibrated or probabilistic models keep predict_proba
+            self._use_margins = hasattr(self.classifier, 'decision_function')
             
-            # Load trained model and vectorizer
-            with open(model_path, 'rb') as f:
-                self.classifier = pickle.load(f)
+            # Chat traffic repeats itself a lot, so memoize intent scoring per instance
+            self._intent_cache = LRUCache(maxsize=4096)
             
-            with open(vectorizer_path, 'rb') as f:
-                self.vectorizer = pickle.load(f)
+            # Normalized text -> future for the batch currently being collected
+            self._intent_waiters = {}
+            self._intent_flush = None
                 
             print("✅ NLP model and vectorizer loaded successfully")
             
-            # Initialize conversation context storage
-            self.conversation_contexts = {}
+            # Conversation context storage, bounded so idle sessions are evicted
+            self.conversation_contexts = LRUCache(maxsize=10_000)
             
             # API endpoints for tool calling - get from environment variable
             self.api_base = os.getenv('API_BASE_URL', 'http://localhost:3001/api')
             
+            # Shared HTTP client, opened once the event loop is running (see start())
+            self._http = None
+            
+            # Short-lived caches for successful backend lookups. They are only
+            # touched from the event loop thread, so no locking is needed
+            self._search_cache = TTLCache(maxsize=2048, ttl=30)
+            self._order_cache = TTLCache(maxsize=2048, ttl=10)
+            
+            # Intent -> handler dispatch table; unknown intents fall back to _h_general
+            self._handlers = {
+                "greeting": self._h_greeting,
+                "product_search": self._h_product_search,
+                "stock_inquiry": self._h_stock_inquiry,
+                "price_inquiry": self._h_price_inquiry,
+                "order_status": self._h_order_status,
+                "provide_phone_number": self._h_provide_phone_number,
+                "show_variants": self._h_show_variants,
+            }
+            
         except Exception as e:
             print(f"❌ Error loading model: {e}")
             raise e
 
-    def predict_intent(self, text):
-        """Predict intent from user input"""
+    async def start(self):
+        """Open the shared HTTP client used for all tool calls"""
+        if self._http is None:
+            # Every call goes to the same backend host, so keep idle sockets warm
+            # between chat turns. HTTP/2 is negotiated via ALPN when the backend
+            # is served over TLS; concurrent calls then share one connection.
+            # The transport retries a failed connect once; _request handles a
+            # pooled socket the backend closed between turns
+            self._http = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    http2=True,
+                    retries=1,
+                    limits=httpx.Limits(
+                        max_connections=32, max_keepalive_connections=32, keepalive_expiry=30
+                    )
+                ),
+                timeout=httpx.Timeout(5.0)
+            )
+
+    async def close(self):
+        """Close the shared HTTP client"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _request(self, method, url, **kwargs):
+        """Call the backend, returning (status, JSON body or None)"""
+        # Retry once after a short pause: a pooled keep-alive socket may have
+        # been closed by the backend between turns
+        for attempt in range(2):
+            try:
+                response = await self._http.request(method, url, **kwargs)
+                if response.status_code == 200:
+                    return response.status_code, response.json()
+                return response.status_code, None
+            except (httpx.RemoteProtocolError, httpx.ReadError):
+                if attempt:
+                    raise
+                await asyncio.sleep(0.1)
+
+    def predict_intent(self, text, text_lower=None):
+        """Predict intent from user input (text_lower: already normalized text, if available)"""
         try:
-            # Transform text using the vectorizer
-            text_vector = self.vectorizer.transform([text])
+            if text_lower is None:
+                text_lower = text.strip().lower()
+            result = self._intent_cache.get(text_lower)
+            if result is None:
+                result = self._intent_cache[text_lower] = self._score_intents([text_lower])[0]
+            return result
             
-            # Predict intent
-            intent = self.classifier.predict(text_vector)[0]
+        except Exception as e:
+            print(f"Error predicting intent: {e}")
+            return "general", 0.0
+
+    async def predict_intent_async(self, text, text_lower=None):
+        """Like predict_intent, but cache misses are batched with other concurrent requests"""
+        try:
+            if text_lower is None:
+                text_lower = text.strip().lower()
+            result = self._intent_cache.get(text_lower)
+            if result is not None:
+                return result
             
-            # Get confidence
-            probabilities = self.classifier.predict_proba(text_vector)[0]
-            confidence = max(probabilities)
+            # Identical messages in the same window share one future
+            future = self._intent_waiters.get(text_lower)
+            if future is None:
+                loop = asyncio.get_running_loop()
+                future = self._intent_waiters[text_lower] = loop.create_future()
+                if len(self._intent_waiters) >= _INTENT_BATCH_MAX:
+                    self._flush_intent_batch()
+                elif self._intent_flush is None:
+                    self._intent_flush = loop.call_later(_INTENT_BATCH_WINDOW, self._flush_intent_batch)
             
-            return intent, confidence
+            # Shielded so a disconnecting client doesn't cancel the others' result
+            return await asyncio.shield(future)
             
         except Exception as e:
             print(f"Error predicting intent: {e}")
             return "general", 0.0
 
-    def extract_entities(self, text):
-        """Extract entities from user input"""
-        entities = {}
-        text_lower = text.lower()
-        
-        # Extract product codes (SS122, B123, H12M pattern)
-        product_code_patterns = [
-            r'\b(ss\d{2,3})\b',  # SS122, SS123, etc.
-            r'\b(b\d{2,3})\b',   # B123, B129, etc.
-            r'\b(h\d{1,2}m?)\b'  # H12M, H123, etc.
-        ]
-        
-        for pattern in product_code_patterns:
-            matches = re.findall(pattern, text_lower)
-            if matches:
-                entities['productCode'] = matches[0].upper()
-                break
-        
-        # Extract order numbers (4-10 digits)
-        order_pattern = r'\b(\d{4,10})\b'
-        order_matches = re.findall(order_pattern, text)
-        if order_matches:
-            entities['orderNumber'] = order_matches[0]
-        
-        # Extract phone numbers (Bangladesh format)
-        phone_pattern = r'\b(01[3-9]\d{8})\b'
-        phone_matches = re.findall(phone_pattern, text)
-        if phone_matches:
-            entities['phoneNumber'] = phone_matches[0]
-        
-        # Extract colors
-        colors = ['red', 'blue', 'green', 'black', 'white', 'yellow', 'pink', 
-                 'purple', 'brown', 'gray', 'grey', 'orange', 'navy', 'maroon', 
-                 'gold', 'silver', 'beige', 'cream']
-        found_colors = [color for color in colors if color in text_lower]
-        if found_colors:
-            entities['colors'] = found_colors
-        
-        # Extract sizes
-        sizes = ['xs', 'small', 's', 'medium', 'm', 'large', 'l', 'xl', 'xxl', 
-                '2xl', '3xl', '36', '37', '38', '39', '40', '41', '42']
-        found_sizes = [size for size in sizes if size in text_lower]
-        if found_sizes:
-            entities['sizes'] = found_sizes
-        
-        # Extract search terms (clean up common words)
-        if entities.get('productCode'):
-            entities['searchTerms'] = [entities['productCode']]
+    def _flush_intent_batch(self):
+        """Score every text collected in the current window and resolve its future"""
+        if self._intent_flush is not None:
+            self._intent_flush.cancel()
+            self._intent_flush = None
+        waiters, self._intent_waiters = self._intent_waiters, {}
+        
+        texts = list(waiters)
+        try:
+            results = self._score_intents(texts)
+        except Exception as e:
+            for future in waiters.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for text, result in zip(texts, results):
+            self._intent_cache[text] = result
+            future = waiters[text]
+            if not future.done():
+                future.set_result(result)
+
+    def _score_intents(self, texts):
+        """Run the vectorizer and classifier on a batch of normalized texts"""
+        # One transform and one classifier call for the whole batch
+        text_vectors = self.vectorizer.transform(texts)
+        rows = np.arange(len(texts))
+        
+        if self._use_margins:
+            margins = self.classifier.decision_function(text_vectors)
+            
+            if margins.ndim == 1:
+                # Binary models return one signed margin per row for the positive class
+                best = (margins > 0).astype(int)
+                confidence = 1.0 / (1.0 + np.exp(-np.abs(margins)))
+            else:
+                # Confidence is the softmax over the two highest margins of each row
+                top = np.argpartition(-margins, 1, axis=1)[:, :2]
+                best = top[:, 0]
+                confidence = 1.0 / (1.0 + np.exp(margins[rows, top[:, 1]] - margins[rows, best]))
         else:
-            common_words = ['search', 'find', 'show', 'get', 'is', 'are', 'the', 
-                          'a', 'an', 'for', 'available', 'i', 'want', 'need', 
-                          'looking', 'product', 'item', 'buy', 'purchase']
-            words = re.findall(r'\b\w+\b', text_lower)
-            search_terms = [word for word in words if len(word) > 1 and word not in common_words]
-            if search_terms:
-                entities['searchTerms'] = search_terms[:3]  # Limit to 3 terms
+            # A single predict_proba call gives both the intent and its confidence
+            probabilities = self.classifier.predict_proba(text_vectors)
+            best = probabilities.argmax(axis=1)
+            confidence = probabilities[rows, best]
         
-        return entities
+        return [(self._classes[b], float(c)) for b, c in zip(best, confidence)]
+
+    def extract_entities(self, text, text_lower=None):
+        """Extract entities from user input (text_lower: already normalized text, if available)"""
+        if text_lower is None:
+            text_lower = text.strip().lower()
+        return _entities_from_items(_extract_entities_cached(text_lower))
 
-    def call_api(self, action, **kwargs):
+    async def call_api(self, action, **kwargs):
         """Make API calls for tool calling"""
         try:
             if action == "search_product":
-                return self._search_products(**kwargs)
+                return await self._search_products(**kwargs)
             elif action == "check_stock":
-                return self._check_stock(**kwargs)
+                return await self._check_stock(**kwargs)
             elif action == "get_price":
-                return self._get_price(**kwargs)
+                return await self._get_price(**kwargs)
             elif action == "track_order":
-                return self._track_order(**kwargs)
+                return await self._track_order(**kwargs)
             elif action == "get_orders_by_phone":
-                return self._get_orders_by_phone(**kwargs)
+                return await self._get_orders_by_phone(**kwargs)
             else:
                 return {"error": f"Unknown action: {action}"}
                 
         except Exception as e:
             return {"error": f"API call failed: {str(e)}"}
 
-    def _search_products(self, filters=None):
+    async def _search_products(self, filters=None, limit=10):
         """Search products via API"""
         try:
             url = f"{self.api_base}/products/search"
@@ -163,20 +421,27 @@ class NLPService:
             if not query:
                 return {"error": "No search query provided"}
             
-            response = requests.post(url, json={"query": query, "limit": 10}, timeout=5)
+            cache_key = ("search", query, limit)
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                return cached
             
-            if response.status_code == 200:
-                return response.json()
+            status, result = await self._request("POST", url, json={"query": query, "limit": limit})
+            
+            if status == 200:
+                self._search_cache[cache_key] = result
+                return result
             else:
-                return {"error": f"Search failed: {response.status_code}"}
+                return {"error": f"Search failed: {status}"}
                 
         except Exception as e:
             return {"error": f"Search API error: {str(e)}"}
 
-    def _check_stock(self, filters=None):
-        """Check product stock via API"""
-        # For now, integrate with search to get product info including stock
-        search_result = self._search_products(filters)
+    async def _find_product(self, filters=None):
+        """Fetch only the best matching product via API"""
+        # Search results carry the full product document (stock, price and
+        # variations), so a single-row search answers every per-product intent
+        search_result = await self._search_products(filters, limit=1)
         
         if 'error' in search_result:
             return search_result
@@ -185,8 +450,16 @@ class NLPService:
         if not products:
             return {"error": "Product not found"}
         
+        return products[0]
+
+    async def _check_stock(self, filters=None):
+        """Check product stock via API"""
+        product = await self._find_product(filters)
+        
+        if 'error' in product:
+            return product
+        
         # Return stock information
-        product = products[0]
         stock_info = {
             "product": product,
             "in_stock": product.get('stock', 0) > 0,
@@ -195,19 +468,14 @@ class NLPService:
         
         return stock_info
 
-    def _get_price(self, filters=None):
+    async def _get_price(self, filters=None):
         """Get product pricing via API"""
-        search_result = self._search_products(filters)
+        product = await self._find_product(filters)
         
-        if 'error' in search_result:
-            return search_result
-        
-        products = search_result.get('products', [])
-        if not products:
-            return {"error": "Product not found"}
+        if 'error' in product:
+            return product
         
         # Return price information
-        product = products[0]
         price_info = {
             "product": product,
             "price": product.get('unitPrice', 0),
@@ -216,370 +484,242 @@ class NLPService:
         
         return price_info
 
-    def _track_order(self, filters=None):
+    async def _track_order(self, filters=None):
         """Track order via API"""
         try:
             if not filters or 'orderNumber' not in filters:
                 return {"error": "Order number required"}
             
+            cache_key = ("order", filters['orderNumber'])
+            cached = self._order_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
             url = f"{self.api_base}/orders/{filters['orderNumber']}"
-            response = requests.get(url, timeout=5)
+            status, result = await self._request("GET", url)
             
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
+            if status == 200:
+                self._order_cache[cache_key] = result
+                return result
+            elif status == 404:
                 return {"error": "Order not found"}
             else:
-                return {"error": f"Order tracking failed: {response.status_code}"}
+                return {"error": f"Order tracking failed: {status}"}
                 
         except Exception as e:
             return {"error": f"Order tracking API error: {str(e)}"}
 
-    def _get_orders_by_phone(self, filters=None):
+    async def _get_orders_by_phone(self, filters=None):
         """Get orders by phone number via API"""
         try:
             if not filters or 'phoneNumber' not in filters:
                 return {"error": "Phone number required"}
             
+            cache_key = ("phone", filters['phoneNumber'])
+            cached = self._order_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
             url = f"{self.api_base}/orders/phone/{filters['phoneNumber']}"
-            response = requests.get(url, timeout=5)
+            status, result = await self._request("GET", url)
             
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
+            if status == 200:
+                self._order_cache[cache_key] = result
+                return result
+            elif status == 404:
                 return {"error": "No orders found for this phone number"}
             else:
-                return {"error": f"Phone lookup failed: {response.status_code}"}
+                return {"error": f"Phone lookup failed: {status}"}
                 
         except Exception as e:
             return {"error": f"Phone lookup API error: {str(e)}"}
 
-    def generate_suggestions(self, intent, entities, action=None, api_result=None):
-        """Generate contextual suggestions for the next user actions"""
-        suggestions = []
-        
-        if intent == "greeting":
-            suggestions = [
-                "Search for women shoes",
-                "Show me hijabs", 
-                "Track my order",
-                "What's available in bags?"
-            ]
-            
-        elif intent == "product_search":
-            if entities.get('productCode'):
-                product_code = entities['productCode']
-                suggestions = [
-                    f"Show colors for {product_code}",
-                    f"Is {product_code} in stock?",
-                    f"Price of {product_code}",
-                    f"What sizes for {product_code}?"
-                ]
-            else:
-                suggestions = [
-                    "Show me more products",
-                    "Filter by color",
-                    "Filter by price range",
-                    "Show product details"
-                ]
-                
-        elif intent == "stock_inquiry":
-            if entities.get('productCode'):
-                product_code = entities['productCode']
-                suggestions = [
-                    f"Price of {product_code}",
-                    f"Show variants for {product_code}",
-                    f"Add {product_code} to cart",
-                    "Show similar products"
-                ]
-            else:
-                suggestions = [
-                    "Check other products",
-                    "Show available items",
-                    "Filter by availability",
-                    "Browse categories"
-                ]
-                
-        elif intent == "price_inquiry":
-            if entities.get('productCode'):
-                product_code = entities['productCode']
-                suggestions = [
-                    f"Is {product_code} in stock?",
-                    f"Show colors for {product_code}",
-                    f"Add {product_code} to cart",
-                    "Compare prices"
-                ]
-            else:
-                suggestions = [
-                    "Show price ranges",
-                    "Filter by budget",
-                    "Show affordable options",
-                    "Compare products"
-                ]
-                
-        elif intent == "order_status":
-            if entities.get('orderNumber'):
-                order_num = entities['orderNumber']
-                suggestions = [
-                    f"Track order {order_num}",
-                    "When will it arrive?",
-                    "Change delivery address",
-                    "Cancel order"
-                ]
-            elif entities.get('phoneNumber'):
-                suggestions = [
-                    "Show recent orders",
-                    "Track latest order",
-                    "Order history",
-                    "Delivery updates"
-                ]
-            else:
-                suggestions = [
-                    "Track with order number",
-                    "Find orders by phone",
-                    "Check recent orders",
-                    "Order history"
-                ]
-                
-        elif intent == "show_variants":
-            if entities.get('productCode'):
-                product_code = entities['productCode']
-                suggestions = [
-                    f"Is {product_code} available in red?",
-                    f"Show {product_code} in medium",
-                    f"Compare {product_code} colors",
-                    f"Size chart for {product_code}"
-                ]
-            else:
-                suggestions = [
-                    "Show size chart",
-                    "Available colors",
-                    "Compare styles",
-                    "Filter by size"
-                ]
-                
-        elif intent == "provide_phone_number":
-            suggestions = [
-                "Track my order",
-                "Show my recent orders",
-                "Order history",
-                "Find orders by phone"
-            ]
-            
-        elif intent == "general":
-            suggestions = [
-                "Search for products",
-                "Track my order", 
-                "Show me categories",
-                "Help with shopping"
-            ]
-        
-        # Limit to 4 suggestions and ensure they're unique
-        unique_suggestions = list(dict.fromkeys(suggestions))
-        return unique_suggestions[:4]
-
-    def process_message(self, message, session_id="default"):
+    def generate_suggestions(self, intent, entities, action=None, api_result=None, msg_lower=None):
+        """Generate contextual suggestions for the next user actions (msg_lower: normalized message)"""
+        entity_templates = _ENTITY_SUGGESTIONS.get(intent)
+        if entity_templates is None:
+            # Intents without entity templates always get their constant tuple
+            return _SUGGESTIONS.get(intent, ())
+        
+        # Fill in the entity-specific templates when the message carried that entity
+        entity_key, templates = entity_templates
+        value = entities.get(entity_key)
+        if value:
+            return [template.format(value) for template in templates]
+        
+        if intent == "order_status" and entities.get('phoneNumber'):
+            return _SUGGESTIONS["order_status_phone"]
+        
+        # Point variant questions at whichever dimension the user hasn't asked about
+        # yet, using the same keywords as _h_show_variants
+        if intent == "show_variants" and msg_lower:
+            if 'color' in msg_lower:
+                return _SUGGESTIONS["show_variants_color"]
+            if 'size' in msg_lower:
+                return _SUGGESTIONS["show_variants_size"]
+        
+        # Everything else is a constant tuple, returned as-is
+        return _SUGGESTIONS.get(intent, ())
+
+    def _order_reply(self, api_result):
+        """Shared reply for order lookups by number or phone"""
+        if 'error' in api_result:
+            return {
+                "type": "error",
+                "content": f"Sorry, I couldn't track your order: {api_result['error']}"
+            }
+        return {
+            "type": "order",
+            "content": "Here's your order information:",
+            "order_data": api_result
+        }
+
+    # Intent handlers. Each takes (entities, msg_lower) and returns
+    # (response, action); process_message fills in the common envelope
+
+    async def _h_greeting(self, entities, msg_lower):
+        return _GREETING_REPLY, "greet_user"
+
+    async def _h_product_search(self, entities, msg_lower):
+        api_result = await self.call_api("search_product", filters=entities)
+        
+        if 'error' in api_result:
+            return {
+                "type": "error",
+                "content": f"Sorry, I couldn't search for products: {api_result['error']}"
+            }, "search_product"
+        
+        products = api_result.get('products', [])
+        if not products:
+            return _NO_PRODUCTS_REPLY, "no_products_found"
+        
+        return {
+            "type": "products",
+            "content": f"Found {len(products)} product(s):",
+            "products": products[:3]  # Limit to 3 results
+        }, "search_product"
+
+    async def _h_stock_inquiry(self, entities, msg_lower):
+        api_result = await self.call_api("check_stock", filters=entities)
+        
+        if 'error' in api_result:
+            return {
+                "type": "error",
+                "content": f"Sorry, I couldn't check stock: {api_result['error']}"
+            }, "check_stock"
+        
+        stock_status = "✅ In Stock" if api_result.get('in_stock') else "❌ Out of Stock"
+        quantity = api_result.get('quantity', 0)
+        product_name = api_result.get('product', {}).get('name', 'Product')
+        
+        return {
+            "type": "stock",
+            "content": f"{product_name}: {stock_status}" + (f" ({quantity} units available)" if quantity > 0 else ""),
+            "stock_info": api_result
+        }, "check_stock"
+
+    async def _h_price_inquiry(self, entities, msg_lower):
+        api_result = await self.call_api("get_price", filters=entities)
+        
+        if 'error' in api_result:
+            return {
+                "type": "error",
+                "content": f"Sorry, I couldn't get price information: {api_result['error']}"
+            }, "get_price"
+        
+        price = api_result.get('price', 0)
+        product_name = api_result.get('product', {}).get('name', 'Product')
+        
+        return {
+            "type": "price",
+            "content": f"{product_name}: ৳{price}",
+            "price_info": api_result
+        }, "get_price"
+
+    async def _h_order_status(self, entities, msg_lower):
+        if 'orderNumber' in entities:
+            api_result = await self.call_api("track_order", filters=entities)
+            return self._order_reply(api_result), "track_order"
+        elif 'phoneNumber' in entities:
+            api_result = await self.call_api("get_orders_by_phone", filters=entities)
+            return self._order_reply(api_result), "get_orders_by_phone"
+        
+        return _ORDER_INFO_REPLY, "request_order_info"
+
+    async def _h_provide_phone_number(self, entities, msg_lower):
+        if 'phoneNumber' not in entities:
+            return _PHONE_NUMBER_REPLY, "request_phone_number"
+        
+        api_result = await self.call_api("get_orders_by_phone", filters=entities)
+        return self._order_reply(api_result), "get_orders_by_phone"
+
+    async def _h_show_variants(self, entities, msg_lower):
+        # Determine specific variant action based on entities
+        if entities.get('color') and entities.get('size'):
+            action = "check_variant_availability"
+        elif 'color' in msg_lower and 'size' in msg_lower:
+            action = "show_all_variants"
+        elif 'color' in msg_lower:
+            action = "show_color_options"
+        elif 'size' in msg_lower or 'chart' in msg_lower:
+            action = "show_size_chart"
+        elif 'compare' in msg_lower or 'difference' in msg_lower:
+            action = "compare_variants"
+        else:
+            action = "show_product_variants"
+        
+        # Variants are embedded in the product, so the top match is all we need
+        search_result = await self.call_api("search_product", filters=entities, limit=1)
+        
+        if 'error' in search_result or not search_result.get('products'):
+            return _NO_PRODUCT_SELECTED_REPLY, action
+        
+        product = search_result['products'][0]
+        variants = product.get('variation', [])
+        
+        if variants:
+            return {
+                "type": "variants",
+                "content": f"Available variants for {product.get('name', 'this product')}:",
+                "variants": variants
+            }, action
+        
+        return {
+            "type": "text",
+            "content": f"{product.get('name', 'This product')} doesn't have variants."
+        }, action
+
+    async def _h_general(self, entities, msg_lower):
+        return _HELP_REPLY, "provide_help"
+
+    async def process_message(self, message, session_id="default"):
         """Main processing function that combines intent prediction with tool calling"""
         try:
-            # Predict intent
-            intent, confidence = self.predict_intent(message)
+            # Normalize once and share it with every step below
+            msg_lower = message.strip().lower()
+            
+            # Predict intent, batched with any concurrent cache misses
+            intent, confidence = await self.predict_intent_async(message, msg_lower)
             
             # Extract entities
-            entities = self.extract_entities(message)
+            entities = self.extract_entities(message, msg_lower)
             
-            # Initialize response structure
-            response = {
+            # Handle the intent, calling the backend API where needed
+            handler = self._handlers.get(intent, self._h_general)
+            reply, action = await handler(entities, msg_lower)
+            
+            return {
                 "intent": intent,
                 "confidence": confidence,
                 "entities": entities,
                 "message": message,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": _iso_now(),
                 "session_id": session_id,
-                "action": None
+                "action": action,
+                "response": reply,
+                "suggestions": self.generate_suggestions(intent, entities, action, reply, msg_lower)
             }
             
-            # Handle different intents with API calls
-            if intent == "greeting":
-                response["action"] = "greet_user"
-                response["response"] = {
-                    "type": "text",
-                    "content": "Hello! I'm your shopping assistant. I can help you with product searches, stock availability, price inquiries, order tracking, and product variants. How can I help you today?"
-                }
-                
-            elif intent == "product_search":
-                response["action"] = "search_product"
-                # Call search API
-                api_result = self.call_api("search_product", filters=entities)
-                
-                if 'error' in api_result:
-                    response["response"] = {
-                        "type": "error",
-                        "content": f"Sorry, I couldn't search for products: {api_result['error']}"
-                    }
-                else:
-                    products = api_result.get('products', [])
-                    if products:
-                        response["response"] = {
-                            "type": "products",
-                            "content": f"Found {len(products)} product(s):",
-                            "products": products[:3]  # Limit to 3 results
-                        }
-                    else:
-                        response["action"] = "no_products_found"
-                        response["response"] = {
-                            "type": "text",
-                            "content": "No products found matching your search. Try different keywords or browse our categories."
-                        }
-                        
-            elif intent == "stock_inquiry":
-                response["action"] = "check_stock"
-                # Call stock check API
-                api_result = self.call_api("check_stock", filters=entities)
-                
-                if 'error' in api_result:
-                    response["response"] = {
-                        "type": "error",
-                        "content": f"Sorry, I couldn't check stock: {api_result['error']}"
-                    }
-                else:
-                    stock_status = "✅ In Stock" if api_result.get('in_stock') else "❌ Out of Stock"
-                    quantity = api_result.get('quantity', 0)
-                    product_name = api_result.get('product', {}).get('name', 'Product')
-                    
-                    response["response"] = {
-                        "type": "stock",
-                        "content": f"{product_name}: {stock_status}" + (f" ({quantity} units available)" if quantity > 0 else ""),
-                        "stock_info": api_result
-                    }
-                    
-            elif intent == "price_inquiry":
-                response["action"] = "get_price"
-                # Call price API
-                api_result = self.call_api("get_price", filters=entities)
-                
-                if 'error' in api_result:
-                    response["response"] = {
-                        "type": "error",
-                        "content": f"Sorry, I couldn't get price information: {api_result['error']}"
-                    }
-                else:
-                    price = api_result.get('price', 0)
-                    product_name = api_result.get('product', {}).get('name', 'Product')
-                    
-                    response["response"] = {
-                        "type": "price",
-                        "content": f"{product_name}: ৳{price}",
-                        "price_info": api_result
-                    }
-                    
-            elif intent == "order_status":
-                # Handle order tracking
-                if 'orderNumber' in entities:
-                    response["action"] = "track_order"
-                    api_result = self.call_api("track_order", filters=entities)
-                elif 'phoneNumber' in entities:
-                    response["action"] = "get_orders_by_phone"
-                    api_result = self.call_api("get_orders_by_phone", filters=entities)
-                else:
-                    response["action"] = "request_order_info"
-                    response["response"] = {
-                        "type": "text",
-                        "content": "Please provide your order number or phone number to track your order."
-                    }
-                    # Generate suggestions and return
-                    response["suggestions"] = self.generate_suggestions(intent, entities, response["action"])
-                    return response
-                
-                if 'error' in api_result:
-                    response["response"] = {
-                        "type": "error",
-                        "content": f"Sorry, I couldn't track your order: {api_result['error']}"
-                    }
-                else:
-                    response["response"] = {
-                        "type": "order",
-                        "content": "Here's your order information:",
-                        "order_data": api_result
-                    }
-                    
-            elif intent == "provide_phone_number":
-                # Handle phone number provision for order lookup
-                if 'phoneNumber' in entities:
-                    response["action"] = "get_orders_by_phone"
-                    api_result = self.call_api("get_orders_by_phone", filters=entities)
-                else:
-                    response["action"] = "request_phone_number"
-                    response["response"] = {
-                        "type": "text",
-                        "content": "Please provide your phone number to find your orders. Example: 01712345678"
-                    }
-                    # Generate suggestions and return
-                    response["suggestions"] = self.generate_suggestions(intent, entities, response["action"])
-                    return response
-                
-                if 'error' in api_result:
-                    response["response"] = {
-                        "type": "error",
-                        "content": f"Sorry, I couldn't track your order: {api_result['error']}"
-                    }
-                else:
-                    response["response"] = {
-                        "type": "order",
-                        "content": "Here's your order information:",
-                        "order_data": api_result
-                    }
-                    
-            elif intent == "show_variants":
-                # Determine specific variant action based on entities
-                if entities.get('color') and entities.get('size'):
-                    response["action"] = "check_variant_availability"
-                elif 'color' in message.lower() and 'size' in message.lower():
-                    response["action"] = "show_all_variants"
-                elif 'color' in message.lower():
-                    response["action"] = "show_color_options"
-                elif 'size' in message.lower() or 'chart' in message.lower():
-                    response["action"] = "show_size_chart"
-                elif 'compare' in message.lower() or 'difference' in message.lower():
-                    response["action"] = "compare_variants"
-                else:
-                    response["action"] = "show_product_variants"
-                
-                # For variants, we'd need to get product details first
-                search_result = self.call_api("search_product", filters=entities)
-                
-                if 'error' in search_result or not search_result.get('products'):
-                    response["response"] = {
-                        "type": "text",
-                        "content": "Please search for a specific product first to see variants."
-                    }
-                else:
-                    product = search_result['products'][0]
-                    variants = product.get('variation', [])
-                    
-                    if variants:
-                        response["response"] = {
-                            "type": "variants",
-                            "content": f"Available variants for {product.get('name', 'this product')}:",
-                            "variants": variants
-                        }
-                    else:
-                        response["response"] = {
-                            "type": "text",
-                            "content": f"{product.get('name', 'This product')} doesn't have variants."
-                        }
-                        
-            else:  # general intent
-                response["action"] = "provide_help"
-                response["response"] = {
-                    "type": "text",
-                    "content": "I'm here to help! I can search products, check stock, provide pricing information, and track orders. What would you like to know?"
-                }
-            
-            # Generate contextual suggestions for all responses
-            response["suggestions"] = self.generate_suggestions(intent, entities, response.get("action"), response.get("response"), message)
-            
-            return response
-            
         except Exception as e:
             return {
                 "intent": "general",
@@ -594,33 +734,48 @@ class NLPService:
 # Initialize the NLP service
 nlp_service = NLPService()
 
+def json_response(payload, status=200):
+    """Serialize a response body with orjson, which is C-implemented and returns bytes directly"""
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return app.response_class(body, status=status, mimetype='application/json')
+
+@app.before_serving
+async def open_http_client():
+    """Open the shared HTTP client once the event loop is running"""
+    await nlp_service.start()
+
+@app.after_serving
+async def close_http_client():
+    """Release pooled backend connections on shutdown"""
+    await nlp_service.close()
+
 @app.route('/predict', methods=['POST'])
-def predict():
+async def predict():
     """API endpoint for intent prediction and processing"""
     try:
-        data = request.get_json()
+        data = await request.get_json()
         
         if not data or 'message' not in data:
-            return jsonify({"error": "Message is required"}), 400
+            return json_response({"error": "Message is required"}, 400)
         
         message = data['message']
         session_id = data.get('session_id', 'default')
         
         # Process the message
-        result = nlp_service.process_message(message, session_id)
+        result = await nlp_service.process_message(message, session_id)
         
-        return jsonify(result)
+        return json_response(result)
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
 
 @app.route('/health', methods=['GET'])
-def health():
+async def health():
     """Health check endpoint"""
-    return jsonify({
+    return json_response({
         "status": "healthy",
         "service": "NLP Service",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _iso_now()
     })
 
 if __name__ == '__main__':
@@ -632,4 +787,5 @@ if __name__ == '__main__':
     print("🔧 API tool calling enabled")
     print(f"🌐 Server starting on http://localhost:{port}")
     
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    # Quart.run turns the reloader on unless told otherwise
+    app.run(host='0.0.0.0', port=port, use_reloader=False)
\ No newline at end of file
@@ -4,52 +4,304 @@ NLP Service for Yuki Chatbot
 Integrates the trained intent classification model with API tool calling
 """
 
-import pickle
+import asyncio
 import json
+import os
+import queue
 import re
 import sys
+import threading
+import time
+import joblib
 import numpy as np
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import requests
+import httpx
+from functools import cached_property
+from cachetools import LRUCache, TTLCache
+from concurrent.futures import Future, InvalidStateError
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+import orjson
+from quart import Quart, request
+from quart_cors import cors
 from datetime import datetime
 
-app = Flask(__name__)
-CORS(app)
+app = Quart(__name__)
+app = cors(app, allow_origin="*")
+
+# Entity patterns, compiled once at import instead of on every message
+# Product codes: SS122, B123, H12M, ... in one alternation so the text is scanned once
+_PRODUCT_CODE_RE = re.compile(r'\b(?:ss\d{2,3}|b\d{2,3}|h\d{1,2}m?)\b', re.I)
+_ORDER_RE = re.compile(r'\b\d{4,10}\b')  # Order numbers (4-10 digits)
+_PHONE_RE = re.compile(r'\b01[3-9]\d{8}\b')  # Phone numbers (Bangladesh format)
+
+# Colour and size vocabularies, each matched as whole words in a single scan
+_COLORS = ('red', 'blue', 'green', 'black', 'white', 'yellow', 'pink',
+           'purple', 'brown', 'gray', 'grey', 'orange', 'navy', 'maroon',
+           'gold', 'silver', 'beige', 'cream')
+_SIZES = ('xs', 'small', 's', 'medium', 'm', 'large', 'l', 'xl', 'xxl',
+          '2xl', '3xl', '36', '37', '38', '39', '40', '41', '42')
+_COLOR_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, _COLORS)) + r')\b')
+_SIZE_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, _SIZES)) + r')\b')
+
+# Filler words dropped from search terms
+_COMMON_WORDS = frozenset({
+    'search', 'find', 'show', 'get', 'is', 'are', 'the', 'a', 'an', 'for',
+    'available', 'i', 'want', 'need', 'looking', 'product', 'item', 'buy', 'purchase'
+})
+
+# Search terms: words of two or more characters that aren't filler words, in one scan
+_SEARCH_TERM_RE = re.compile(
+    r'\b(?!(?:' + '|'.join(sorted(_COMMON_WORDS)) + r')\b)\w{2,}\b'
+)
+
+# Rule-based follow-up suggestions per intent. They never change, so they are built once
+_SUGGESTIONS = {
+    "greeting": ("Search for women shoes", "Show me hijabs", "Track my order", "What's available in bags?"),
+    "product_search": ("Show me more products", "Filter by color", "Filter by price range", "Show product details"),
+    "stock_inquiry": ("Check other products", "Show available items", "Filter by availability", "Browse categories"),
+    "price_inquiry": ("Show price ranges", "Filter by budget", "Show affordable options", "Compare products"),
+    "order_status": ("Track with order number", "Find orders by phone", "Check recent orders", "Order history"),
+    "order_status_phone": ("Show recent orders", "Track latest order", "Order history", "Delivery updates"),
+    "show_variants": ("Show size chart", "Available colors", "Compare styles", "Filter by size"),
+    "provide_phone_number": ("Track my order", "Show my recent orders", "Order history", "Find orders by phone"),
+    "general": ("Search for products", "Track my order", "Show me categories", "Help with shopping"),
+}
+
+# Suggestions that mention an entity: intent -> (entity key, templates filled from the entities)
+_ENTITY_SUGGESTIONS = {
+    "product_search": ("productCode", (
+        "Show colors for {productCode}", "Is {productCode} in stock?",
+        "Price of {productCode}", "What sizes for {productCode}?"
+    )),
+    "stock_inquiry": ("productCode", (
+        "Price of {productCode}", "Show variants for {productCode}",
+        "Add {productCode} to cart", "Show similar products"
+    )),
+    "price_inquiry": ("productCode", (
+        "Is {productCode} in stock?", "Show colors for {productCode}",
+        "Add {productCode} to cart", "Compare prices"
+    )),
+    "order_status": ("orderNumber", (
+        "Track order {orderNumber}", "When will it arrive?", "Change delivery address", "Cancel order"
+    )),
+    "show_variants": ("productCode", (
+        "Is {productCode} available in red?", "Show {productCode} in medium",
+        "Compare {productCode} colors", "Size chart for {productCode}"
+    )),
+}
+
+# Keywords that pick the show_variants action
+_VARIANT_KEYWORDS = ('color', 'size', 'chart', 'compare', 'difference')
+
+# Feature hashing for the suggestion context strings when use_hashing is set.
+# train_suggestions.py trains the suggestion model on exactly these features
+_SUGGESTION_HASHING_PARAMS = dict(n_features=2**15, alternate_sign=False, norm=None)
+
+# Timeouts in seconds for backend API calls: 1 to connect, 5 for everything else
+_API_TIMEOUT = httpx.Timeout(5.0, connect=1.0)
+
+def _resolve(future, result=None, exception=None):
+    """Complete a batcher future, ignoring one that was cancelled in the meantime"""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+class MicroBatcher:
+    """Collects model calls from concurrent requests and runs them in batches on a worker thread
+
+    Each kind of call (e.g. "intent", "suggestion") has its own batch function taking a
+    list of inputs and returning one result per input. One thread serves all kinds.
+    """
+
+    def __init__(self, batch_functions, max_batch=64, max_wait=0.005):
+        self._batch_functions = batch_functions
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        # The worker thread is started on first use, in the process that uses it:
+        # with gunicorn's preload_app the module is imported before workers fork,
+        # and threads don't survive a fork
+        self._start_lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name="micro-batcher", daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def submit(self, kind, item):
+        """Queue an input for the given kind of call; returns a Future resolving to its result"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((kind, item, future))
+        return future
+
+    def _run(self, pending):
+        while True:
+            # Block for the first request, then gather more for up to max_wait seconds
+            batch = [pending.get()]
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # One call per kind; identical inputs in one batch are computed once.
+            # Requests whose caller already gave up are dropped
+            waiting = {}
+            for kind, item, future in batch:
+                if not future.cancelled():
+                    waiting.setdefault(kind, {}).setdefault(item, []).append(future)
+            
+            for kind, futures_by_item in waiting.items():
+                items = list(futures_by_item)
+                try:
+                    results = self._batch_functions[kind](items)
+                except Exception as e:
+                    for futures in futures_by_item.values():
+                        for future in futures:
+                            _resolve(future, exception=e)
+                    continue
+                
+                for item, result in zip(items, results):
+                    for future in futures_by_item[item]:
+                        _resolve(future, result)
+
+class CompactLogisticRegression:
+    """Inference-only copy of a fitted LogisticRegression with compact weights
+
+    With quantize=True each class row of coef_ is scaled to [-127, 127] and stored
+    as int8 together with its float scale; otherwise the weights are kept as float32.
+    Scoring gathers only the weight rows of the features present in the input, so a
+    chat message touches a few hundred bytes of weights. All arrays are read-only.
+    """
+
+    def __init__(self, classifier, quantize=True):
+        coef = np.asarray(classifier.coef_, dtype=np.float64)
+        if quantize:
+            scale = np.abs(coef).max(axis=1) / 127.0
+            scale[scale == 0] = 1.0
+            weights = np.round(coef / scale[:, None]).astype(np.int8)
+        else:
+            scale = np.ones(coef.shape[0])
+            weights = coef.astype(np.float32)
+        
+        self.classes_ = classifier.classes_
+        # Fortran order, viewed as (n_features, n_rows), so each input feature's
+        # weights for every class are contiguous
+        self._weights = np.asfortranarray(weights).T
+        self._scale = scale
+        self._intercept = np.array(classifier.intercept_, dtype=np.float64)
+        for array in (self._weights, self._scale, self._intercept):
+            array.flags.writeable = False
+        
+        # Same rule LogisticRegression.predict_proba uses to choose one-vs-rest
+        multi_class = getattr(classifier, 'multi_class', 'auto')
+        self._ovr = multi_class == 'ovr' or (
+            multi_class != 'multinomial'
+            and (len(self.classes_) <= 2 or getattr(classifier, 'solver', None) == 'liblinear')
+        )
+
+    def decision_function(self, X):
+        X = X.tocsr()
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+        logits = np.zeros((X.shape[0], self._weights.shape[1]))
+        np.add.at(logits, rows, self._weights[X.indices] * X.data[:, None])
+        return logits * self._scale + self._intercept
+
+    def predict_proba(self, X):
+        logits = self.decision_function(X)
+        
+        if self._ovr:
+            probabilities = 1.0 / (1.0 + np.exp(-logits))
+            if probabilities.shape[1] == 1:
+                # Binary models have a single row of weights for the positive class
+                return np.hstack([1.0 - probabilities, probabilities])
+            return probabilities / probabilities.sum(axis=1, keepdims=True)
+        
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
 
 class NLPService:
     def __init__(self, model_path='model.pkl', vectorizer_path='vectorizer.pkl',
                  suggestion_model_path='suggestion_model.pkl',
                  suggestion_vectorizer_path='suggestion_vectorizer.pkl',
-                 suggestion_binarizer_path='suggestion_binarizer.pkl'):
-        """Initialize the NLP service with trained model and vectorizer"""
+                 suggestion_binarizer_path='suggestion_binarizer.pkl',
+                 use_hashing=False, quantize_weights=True):
+        """Initialize the NLP service with trained model and vectorizer
+
+        use_hashing: vectorize suggestion contexts with a stateless HashingVectorizer.
+        The suggestion artifacts must then come from train_suggestions.py, which saves
+        the TfidfTransformer fitted on the hashed contexts as suggestion_vectorizer_path
+        quantize_weights: score intents with int8 weights when the classifier is a
+        LogisticRegression; False uses float32 weights instead
+        """
         try:
-            # Load trained model and vectorizer
-            with open(model_path, 'rb') as f:
-                self.classifier = pickle.load(f)
-            
-            with open(vectorizer_path, 'rb') as f:
-                self.vectorizer = pickle.load(f)
+            # Load trained model and vectorizer. Artifacts re-saved with
+            # resave_models.py have their arrays memory-mapped read-only, so
+            # worker processes share the same pages instead of private copies
+            self.classifier = joblib.load(model_path, mmap_mode='r')
+            self.vectorizer = joblib.load(vectorizer_path, mmap_mode='r')
                 
             print("✅ NLP model and vectorizer loaded successfully")
             
-            # Load suggestion model components
-            try:
-                with open(suggestion_model_path, 'rb') as f:
-                    self.suggestion_model = pickle.load(f)
-                
-                with open(suggestion_vectorizer_path, 'rb') as f:
-                    self.suggestion_vectorizer = pickle.load(f)
-                
-                with open(suggestion_binarizer_path, 'rb') as f:
-                    self.suggestion_binarizer = pickle.load(f)
-                
-                print("✅ Intelligent suggestion model loaded successfully")
-                self.intelligent_suggestions_enabled = True
-            except Exception as e:
-                print(f"⚠️ Could not load suggestion model: {e}")
+            # Model used for scoring; other classifier types are used as loaded
+            self._intent_model = self.classifier
+            if isinstance(self.classifier, LogisticRegression):
+                self._intent_model = CompactLogisticRegression(self.classifier, quantize_weights)
+            
+            # Cache misses from concurrent requests are vectorized and scored together
+            self._batcher = MicroBatcher({
+                "intent": self._score_intents,
+                "suggestion": self._predict_suggestion_batch,
+            })
+            
+            # Chat traffic repeats itself a lot, so memoize intent scoring per instance
+            self._intent_cache = LRUCache(maxsize=4096)
+            
+            # Suggestion model components are loaded on first use (see the properties
+            # below and _load_suggestion_components); at startup only check that they
+            # are there
+            self._suggestion_model_path = suggestion_model_path
+            self._suggestion_vectorizer_path = suggestion_vectorizer_path
+            self._suggestion_binarizer_path = suggestion_binarizer_path
+            self._use_hashing = use_hashing
+            self._suggestion_components_loaded = False
+            self._suggestion_load_lock = asyncio.Lock()
+            missing = [path for path in (suggestion_model_path, suggestion_vectorizer_path,
+                                         suggestion_binarizer_path) if not os.path.exists(path)]
+            self.intelligent_suggestions_enabled = not missing
+            
+            # Context strings repeat as often as the turns they describe
+            self._suggestion_cache = LRUCache(maxsize=4096)
+            
+            if self.intelligent_suggestions_enabled:
+                print("✅ Intelligent suggestion model found (loaded on first use)")
+            else:
+                print(f"⚠️ Could not find suggestion model files: {', '.join(missing)}")
                 print("Falling back to rule-based suggestions")
-                self.intelligent_suggestions_enabled = False
+            
+            # Suggestion buttons send their own text back verbatim, so score those
+            # phrases once up front and answer them with a plain dict lookup
+            self._canned_intents = self._score_canned_phrases()
             
             # Initialize conversation context storage
             self.conversation_contexts = {}
@@ -57,71 +309,170 @@ class NLPService:
             # API endpoints for tool calling
             self.api_base = "http://localhost:3001/api"
             
+            # Shared HTTP client, opened once the event loop is running (see start())
+            self.http = None
+            
+            # Recent successful searches by query. A stock or price question and the
+            # variant/search follow-up for the same product reuse one backend call.
+            # Only touched from the event loop thread, so no locking is needed
+            self._search_cache = TTLCache(maxsize=1024, ttl=30)
+            
+            # Intent -> handler dispatch table; unknown intents fall back to _h_general
+            self._handlers = {
+                "greeting": self._h_greeting,
+                "product_search": self._h_product_search,
+                "stock_inquiry": self._h_stock_inquiry,
+                "price_inquiry": self._h_price_inquiry,
+                "order_status": self._h_order_status,
+                "provide_phone_number": self._h_provide_phone_number,
+                "show_variants": self._h_show_variants,
+            }
+            
         except Exception as e:
             print(f"❌ Error loading model: {e}")
             raise e
 
-    def predict_intent(self, text):
-        """Predict intent from user input"""
+    def _load_suggestion_artifact(self, path):
+        """Load one suggestion model component, switching to rule-based suggestions on failure"""
         try:
-            # Transform text using the vectorizer
-            text_vector = self.vectorizer.transform([text])
-            
-            # Predict intent
-            intent = self.classifier.predict(text_vector)[0]
-            
-            # Get confidence
-            probabilities = self.classifier.predict_proba(text_vector)[0]
-            confidence = max(probabilities)
-            
-            return intent, confidence
+            return joblib.load(path, mmap_mode='r')
+        except Exception as e:
+            print(f"⚠️ Could not load suggestion model: {e}")
+            print("Falling back to rule-based suggestions")
+            self.intelligent_suggestions_enabled = False
+            raise
+
+    @cached_property
+    def suggestion_model(self):
+        return self._load_suggestion_artifact(self._suggestion_model_path)
+
+    @cached_property
+    def suggestion_vectorizer(self):
+        vectorizer = self._load_suggestion_artifact(self._suggestion_vectorizer_path)
+        if self._use_hashing:
+            # Only the idf weights are learned; the hashing step needs no vocabulary
+            vectorizer = make_pipeline(HashingVectorizer(**_SUGGESTION_HASHING_PARAMS), vectorizer)
+        return vectorizer
+
+    @cached_property
+    def suggestion_binarizer(self):
+        return self._load_suggestion_artifact(self._suggestion_binarizer_path)
+
+    async def _load_suggestion_components(self):
+        """Load the suggestion model components once, in a worker thread
+
+        Loading them from _predict_suggestion_batch would stall the micro-batcher
+        thread, and every intent batch queued behind it, for the whole load
+        """
+        if self._suggestion_components_loaded:
+            return
+        async with self._suggestion_load_lock:
+            if not self._suggestion_components_loaded:
+                await asyncio.to_thread(
+                    lambda: (self.suggestion_model, self.suggestion_vectorizer, self.suggestion_binarizer)
+                )
+                self._suggestion_components_loaded = True
+
+    async def start(self):
+        """Open the shared HTTP client used for all tool calls"""
+        if self.http is None:
+            # Pooled keep-alive connections to the backend, shared by all requests
+            self.http = httpx.AsyncClient(
+                timeout=_API_TIMEOUT,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            )
+
+    async def close(self):
+        """Close the shared HTTP client"""
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+    async def _run_batched(self, kind, item):
+        """Hand one model call to the micro-batcher and await its result"""
+        future = self._batcher.submit(kind, item)
+        # Shielded so a timeout or disconnect only abandons this caller's wait;
+        # the batch still resolves the future for the batcher thread
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=5)
+
+    async def predict_intent(self, text, text_lower=None):
+        """Predict intent from user input (text_lower: already normalized text, if available)"""
+        try:
+            if text_lower is None:
+                text_lower = text.strip().lower()
+            result = self._canned_intents.get(text_lower) or self._intent_cache.get(text_lower)
+            if result is not None:
+                return result
+            
+            # Cache misses are scored on the batcher's thread, batched with other
+            # requests waiting at the same time, without blocking the event loop
+            result = await self._run_batched("intent", text_lower)
+            self._intent_cache[text_lower] = result
+            return result
             
         except Exception as e:
             print(f"Error predicting intent: {e}")
             return "general", 0.0
 
-    def extract_entities(self, text):
-        """Extract entities from user input"""
-        entities = {}
-        text_lower = text.lower()
+    def _score_intents(self, texts):
+        """Run the vectorizer and classifier on a batch of normalized texts"""
+        # Transform all texts using the vectorizer
+        text_vectors = self.vectorizer.transform(texts)
         
-        # Extract product codes (SS122, B123, H12M pattern)
-        product_code_patterns = [
-            r'\b(ss\d{2,3})\b',  # SS122, SS123, etc.
-            r'\b(b\d{2,3})\b',   # B123, B129, etc.
-            r'\b(h\d{1,2}m?)\b'  # H12M, H123, etc.
-        ]
+        # A single predict_proba call gives both the intents and their confidence
+        probabilities = self._intent_model.predict_proba(text_vectors)
+        best = probabilities.argmax(axis=1)
+        confidence = probabilities[np.arange(len(texts)), best]
         
-        for pattern in product_code_patterns:
-            matches = re.findall(pattern, text_lower)
-            if matches:
-                entities['productCode'] = matches[0].upper()
-                break
+        return [(self._intent_model.classes_[b], float(c)) for b, c in zip(best, confidence)]
+
+    def _score_canned_phrases(self):
+        """Map every fixed suggestion phrase (normalized) to its predicted intent"""
+        phrases = set()
+        for intent in self.classifier.classes_:
+            phrases.update(self.generate_rule_based_suggestions(intent, {}))
+        phrases.update(self.generate_rule_based_suggestions("order_status", {'phoneNumber': True}))
+        if self.intelligent_suggestions_enabled:
+            # The binarizer is only the label list, so loading it here is cheap
+            try:
+                phrases.update(self.suggestion_binarizer.classes_)
+            except Exception:
+                pass
+        
+        # Templated suggestions ("Price of SS122") vary per product and go through the model
+        texts = sorted({phrase.strip().lower() for phrase in phrases})
+        if not texts:
+            return {}
+        return dict(zip(texts, self._score_intents(texts)))
+
+    def extract_entities(self, text, text_lower=None):
+        """Extract entities from user input (text_lower: already normalized text, if available)"""
+        entities = {}
+        if text_lower is None:
+            text_lower = text.strip().lower()
+        
+        # Extract product codes (SS122, B123, H12M pattern); only the first is used
+        product_code_match = _PRODUCT_CODE_RE.search(text_lower)
+        if product_code_match:
+            entities['productCode'] = product_code_match.group(0).upper()
         
         # Extract order numbers (4-10 digits)
-        order_pattern = r'\b(\d{4,10})\b'
-        order_matches = re.findall(order_pattern, text)
-        if order_matches:
-            entities['orderNumber'] = order_matches[0]
+        order_match = _ORDER_RE.search(text)
+        if order_match:
+            entities['orderNumber'] = order_match.group(0)
         
         # Extract phone numbers (Bangladesh format)
-        phone_pattern = r'\b(01[3-9]\d{8})\b'
-        phone_matches = re.findall(phone_pattern, text)
-        if phone_matches:
-            entities['phoneNumber'] = phone_matches[0]
-        
-        # Extract colors
-        colors = ['red', 'blue', 'green', 'black', 'white', 'yellow', 'pink', 
-                 'purple', 'brown', 'gray', 'grey', 'orange', 'navy', 'maroon', 
-                 'gold', 'silver', 'beige', 'cream']
-        found_colors = [color for color in colors if color in text_lower]
+        phone_match = _PHONE_RE.search(text)
+        if phone_match:
+            entities['phoneNumber'] = phone_match.group(0)
+        
+        # Extract colors (whole words, in order of appearance, without repeats)
+        found_colors = list(dict.fromkeys(_COLOR_RE.findall(text_lower)))
         if found_colors:
             entities['colors'] = found_colors
         
-        # Extract sizes
-        sizes = ['xs', 'small', 's', 'medium', 'm', 'large', 'l', 'xl', 'xxl', 
-                '2xl', '3xl', '36', '37', '38', '39', '40', '41', '42']
-        found_sizes = [size for size in sizes if size in text_lower]
+        # Extract sizes; whole-word matching keeps 's' and 'm' from matching inside words
+        found_sizes = list(dict.fromkeys(_SIZE_RE.findall(text_lower)))
         if found_sizes:
             entities['sizes'] = found_sizes
         
@@ -129,36 +480,32 @@ class NLPService:
         if entities.get('productCode'):
             entities['searchTerms'] = [entities['productCode']]
         else:
-            common_words = ['search', 'find', 'show', 'get', 'is', 'are', 'the', 
-                          'a', 'an', 'for', 'available', 'i', 'want', 'need', 
-                          'looking', 'product', 'item', 'buy', 'purchase']
-            words = re.findall(r'\b\w+\b', text_lower)
-            search_terms = [word for word in words if len(word) > 1 and word not in common_words]
+            search_terms = _SEARCH_TERM_RE.findall(text_lower)
             if search_terms:
                 entities['searchTerms'] = search_terms[:3]  # Limit to 3 terms
         
         return entities
 
-    def call_api(self, action, **kwargs):
+    async def call_api(self, action, **kwargs):
         """Make API calls for tool calling"""
         try:
             if action == "search_product":
-                return self._search_products(**kwargs)
+                return await self._search_products(**kwargs)
             elif action == "check_stock":
-                return self._check_stock(**kwargs)
+                return await self._check_stock(**kwargs)
             elif action == "get_price":
-                return self._get_price(**kwargs)
+                return await self._get_price(**kwargs)
             elif action == "track_order":
-                return self._track_order(**kwargs)
+                return await self._track_order(**kwargs)
             elif action == "get_orders_by_phone":
-                return self._get_orders_by_phone(**kwargs)
+                return await self._get_orders_by_phone(**kwargs)
             else:
                 return {"error": f"Unknown action: {action}"}
                 
         except Exception as e:
             return {"error": f"API call failed: {str(e)}"}
 
-    def _search_products(self, filters=None):
+    async def _search_products(self, filters=None):
         """Search products via API"""
         try:
             url = f"{self.api_base}/products/search"
@@ -179,20 +526,26 @@ class NLPService:
             if not query:
                 return {"error": "No search query provided"}
             
-            response = requests.post(url, json={"query": query, "limit": 10}, timeout=5)
+            cached = self._search_cache.get(query)
+            if cached is not None:
+                return cached
+            
+            response = await self.http.post(url, json={"query": query, "limit": 10})
             
             if response.status_code == 200:
-                return response.json()
+                result = response.json()
+                self._search_cache[query] = result
+                return result
             else:
                 return {"error": f"Search failed: {response.status_code}"}
                 
         except Exception as e:
             return {"error": f"Search API error: {str(e)}"}
 
-    def _check_stock(self, filters=None):
+    async def _check_stock(self, filters=None):
         """Check product stock via API"""
         # For now, integrate with search to get product info including stock
-        search_result = self._search_products(filters)
+        search_result = await self._search_products(filters)
         
         if 'error' in search_result:
             return search_result
@@ -211,9 +564,9 @@ class NLPService:
         
         return stock_info
 
-    def _get_price(self, filters=None):
+    async def _get_price(self, filters=None):
         """Get product pricing via API"""
-        search_result = self._search_products(filters)
+        search_result = await self._search_products(filters)
         
         if 'error' in search_result:
             return search_result
@@ -232,14 +585,14 @@ class NLPService:
         
         return price_info
 
-    def _track_order(self, filters=None):
+    async def _track_order(self, filters=None):
         """Track order via API"""
         try:
             if not filters or 'orderNumber' not in filters:
                 return {"error": "Order number required"}
             
             url = f"{self.api_base}/orders/{filters['orderNumber']}"
-            response = requests.get(url, timeout=5)
+            response = await self.http.get(url)
             
             if response.status_code == 200:
                 return response.json()
@@ -251,14 +604,14 @@ class NLPService:
         except Exception as e:
             return {"error": f"Order tracking API error: {str(e)}"}
 
-    def _get_orders_by_phone(self, filters=None):
+    async def _get_orders_by_phone(self, filters=None):
         """Get orders by phone number via API"""
         try:
             if not filters or 'phoneNumber' not in filters:
                 return {"error": "Phone number required"}
             
             url = f"{self.api_base}/orders/phone/{filters['phoneNumber']}"
-            response = requests.get(url, timeout=5)
+            response = await self.http.get(url)
             
             if response.status_code == 200:
                 return response.json()
@@ -310,399 +663,272 @@ class NLPService:
     
     def _create_context_string_for_suggestions(self, context):
         """Create context string for suggestion model (same as training)"""
-        features = []
-        
-        # Add intent information
-        if 'last_intent' in context:
-            features.append(f"intent_{context['last_intent']}")
-        
-        # Add conversation stage
-        if 'conversation_stage' in context:
-            features.append(f"stage_{context['conversation_stage']}")
+        # _create_context_for_suggestions always fills every key used here
+        entities = context['entities']
+        tokens = ['intent_' + context['last_intent'], 'stage_' + context['conversation_stage']]
         
         # Add entity information
-        if 'entities' in context:
-            entities = context['entities']
-            if 'productCode' in entities:
-                features.append(f"has_product_code")
-            if 'searchTerms' in entities:
-                features.extend([f"search_{term}" for term in entities['searchTerms']])
-            if 'colors' in entities:
-                features.extend([f"color_{color}" for color in entities['colors']])
-            if 'sizes' in entities:
-                features.extend([f"size_{size}" for size in entities['sizes']])
-            if 'orderNumber' in entities:
-                features.append("has_order_number")
-            if 'phoneNumber' in entities:
-                features.append("has_phone_number")
+        if 'productCode' in entities:
+            tokens.append('has_product_code')
+        tokens += ['search_' + term for term in entities.get('searchTerms', ())]
+        tokens += ['color_' + color for color in entities.get('colors', ())]
+        tokens += ['size_' + size for size in entities.get('sizes', ())]
+        if 'orderNumber' in entities:
+            tokens.append('has_order_number')
+        if 'phoneNumber' in entities:
+            tokens.append('has_phone_number')
         
         # Add products found flag
-        if context.get('products_found'):
-            features.append("products_found")
-        else:
-            features.append("no_products_found")
+        tokens.append('products_found' if context['products_found'] else 'no_products_found')
         
-        # Add last message (cleaned)
-        if 'last_message' in context:
-            message_words = context['last_message'].lower().split()
-            features.extend([f"msg_{word}" for word in message_words[:5]])  # Limit to 5 words
+        # Add last message (cleaned), limited to 5 words
+        tokens += ['msg_' + word for word in context['last_message'].lower().split()[:5]]
         
-        return ' '.join(features)
+        return ' '.join(tokens)
     
-    def predict_intelligent_suggestions(self, context, top_k=4):
+    async def predict_intelligent_suggestions(self, context, top_k=4):
         """Use ML model to predict intelligent suggestions"""
         try:
             # Create context string
             context_str = self._create_context_string_for_suggestions(context)
             
-            # Vectorize
-            X = self.suggestion_vectorizer.transform([context_str])
-            
-            # Get binary predictions
-            predictions = self.suggestion_model.predict(X)[0]
-            
-            # Get suggestions where prediction is 1
-            suggested_indices = np.where(predictions == 1)[0]
+            suggested_classes = self._suggestion_cache.get(context_str)
+            if suggested_classes is None:
+                await self._load_suggestion_components()
+                suggested_classes = await self._run_batched("suggestion", context_str)
+                self._suggestion_cache[context_str] = suggested_classes
             
-            if len(suggested_indices) == 0:
+            if not suggested_classes:
                 # Fallback to rule-based suggestions
                 return self.generate_rule_based_suggestions(context['last_intent'], context['entities'])
             
-            # Get suggested classes
-            suggested_classes = [self.suggestion_binarizer.classes_[i] for i in suggested_indices]
-            
             # Return top k suggestions
-            return suggested_classes[:top_k]
+            return list(suggested_classes[:top_k])
             
         except Exception as e:
             print(f"Error in intelligent suggestions: {e}")
             # Fallback to rule-based suggestions
             return self.generate_rule_based_suggestions(context['last_intent'], context['entities'])
     
-    def generate_suggestions(self, intent, entities, action=None, api_result=None, last_message=""):
+    def _predict_suggestion_batch(self, context_strs):
+        """Run the suggestion vectorizer and model on a batch of context strings"""
+        # Vectorize
+        X = self.suggestion_vectorizer.transform(context_strs)
+        
+        # Get binary predictions, one row of 0/1 flags per context
+        predictions = self.suggestion_model.predict(X)
+        if hasattr(predictions, 'toarray'):
+            predictions = predictions.toarray()
+        
+        # Get suggestions where prediction is 1
+        classes = self.suggestion_binarizer.classes_
+        return [tuple(classes[row == 1]) for row in predictions]
+    
+    async def generate_suggestions(self, intent, entities, action=None, api_result=None, last_message=""):
         """Generate contextual suggestions for the next user actions"""
         if self.intelligent_suggestions_enabled:
             # Use intelligent ML-based suggestions
             context = self._create_context_for_suggestions(intent, entities, action, last_message)
-            return self.predict_intelligent_suggestions(context)
+            return await self.predict_intelligent_suggestions(context)
         else:
             # Fallback to rule-based suggestions
             return self.generate_rule_based_suggestions(intent, entities)
     
     def generate_rule_based_suggestions(self, intent, entities):
         """Generate rule-based suggestions (original method)"""
-        suggestions = []
+        # Fill in the entity-specific templates when the message carried that entity
+        entity_templates = _ENTITY_SUGGESTIONS.get(intent)
+        if entity_templates:
+            entity_key, templates = entity_templates
+            if entities.get(entity_key):
+                return [template.format_map(entities) for template in templates]
         
-        if intent == "greeting":
-            suggestions = [
-                "Search for women shoes",
-                "Show me hijabs", 
-                "Track my order",
-                "What's available in bags?"
-            ]
-            
-        elif intent == "product_search":
-            if entities.get('productCode'):
-                product_code = entities['productCode']
-                suggestions = [
-                    f"Show colors for {product_code}",
-                    f"Is {product_code} in stock?",
-                    f"Price of {product_code}",
-                    f"What sizes for {product_code}?"
-                ]
-            else:
-                suggestions = [
-                    "Show me more products",
-                    "Filter by color",
-                    "Filter by price range",
-                    "Show product details"
-                ]
-                
-        elif intent == "stock_inquiry":
-            if entities.get('productCode'):
-                product_code = entities['productCode']
-                suggestions = [
-                    f"Price of {product_code}",
-                    f"Show variants for {product_code}",
-                    f"Add {product_code} to cart",
-                    "Show similar products"
-                ]
-            else:
-                suggestions = [
-                    "Check other products",
-                    "Show available items",
-                    "Filter by availability",
-                    "Browse categories"
-                ]
-                
-        elif intent == "price_inquiry":
-            if entities.get('productCode'):
-                product_code = entities['productCode']
-                suggestions = [
-                    f"Is {product_code} in stock?",
-                    f"Show colors for {product_code}",
-                    f"Add {product_code} to cart",
-                    "Compare prices"
-                ]
-            else:
-                suggestions = [
-                    "Show price ranges",
-                    "Filter by budget",
-                    "Show affordable options",
-                    "Compare products"
-                ]
-                
-        elif intent == "order_status":
-            if entities.get('orderNumber'):
-                order_num = entities['orderNumber']
-                suggestions = [
-                    f"Track order {order_num}",
-                    "When will it arrive?",
-                    "Change delivery address",
-                    "Cancel order"
-                ]
-            elif entities.get('phoneNumber'):
-                suggestions = [
-                    "Show recent orders",
-                    "Track latest order",
-                    "Order history",
-                    "Delivery updates"
-                ]
-            else:
-                suggestions = [
-                    "Track with order number",
-                    "Find orders by phone",
-                    "Check recent orders",
-                    "Order history"
-                ]
-                
-        elif intent == "show_variants":
-            if entities.get('productCode'):
-                product_code = entities['productCode']
-                suggestions = [
-                    f"Is {product_code} available in red?",
-                    f"Show {product_code} in medium",
-                    f"Compare {product_code} colors",
-                    f"Size chart for {product_code}"
-                ]
-            else:
-                suggestions = [
-                    "Show size chart",
-                    "Available colors",
-                    "Compare styles",
-                    "Filter by size"
-                ]
-                
-        elif intent == "provide_phone_number":
-            suggestions = [
-                "Track my order",
-                "Show my recent orders",
-                "Order history",
-                "Find orders by phone"
-            ]
-            
-        elif intent == "general":
-            suggestions = [
-                "Search for products",
-                "Track my order", 
-                "Show me categories",
-                "Help with shopping"
-            ]
-        
-        # Limit to 4 suggestions and ensure they're unique
-        unique_suggestions = list(dict.fromkeys(suggestions))
-        return unique_suggestions[:4]
-
-    def process_message(self, message, session_id="default"):
+        if intent == "order_status" and entities.get('phoneNumber'):
+            return _SUGGESTIONS["order_status_phone"]
+        
+        # Everything else is a constant tuple of unique suggestions, returned as-is
+        return _SUGGESTIONS.get(intent, ())
+
+    def _order_reply(self, api_result):
+        """Shared reply for order lookups by number or phone"""
+        if 'error' in api_result:
+            return {
+                "type": "error",
+                "content": f"Sorry, I couldn't track your order: {api_result['error']}"
+            }
+        return {
+            "type": "order",
+            "content": "Here's your order information:",
+            "order_data": api_result
+        }
+
+    # Intent handlers. Each takes (entities, msg_lower) and returns (response, action);
+    # process_message fills in the common envelope
+
+    async def _h_greeting(self, entities, msg_lower):
+        return {
+            "type": "text",
+            "content": "Hello! I'm your shopping assistant. I can help you with product searches, stock availability, price inquiries, order tracking, and product variants. How can I help you today?"
+        }, "greet_user"
+
+    async def _h_product_search(self, entities, msg_lower):
+        api_result = await self.call_api("search_product", filters=entities)
+        
+        if 'error' in api_result:
+            return {
+                "type": "error",
+                "content": f"Sorry, I couldn't search for products: {api_result['error']}"
+            }, "search_product"
+        
+        products = api_result.get('products', [])
+        if not products:
+            return {
+                "type": "text",
+                "content": "No products found matching your search. Try different keywords or browse our categories."
+            }, "no_products_found"
+        
+        return {
+            "type": "products",
+            "content": f"Found {len(products)} product(s):",
+            "products": products[:3]  # Limit to 3 results
+        }, "search_product"
+
+    async def _h_stock_inquiry(self, entities, msg_lower):
+        api_result = await self.call_api("check_stock", filters=entities)
+        
+        if 'error' in api_result:
+            return {
+                "type": "error",
+                "content": f"Sorry, I couldn't check stock: {api_result['error']}"
+            }, "check_stock"
+        
+        stock_status = "✅ In Stock" if api_result.get('in_stock') else "❌ Out of Stock"
+        quantity = api_result.get('quantity', 0)
+        product_name = api_result.get('product', {}).get('name', 'Product')
+        
+        return {
+            "type": "stock",
+            "content": f"{product_name}: {stock_status}" + (f" ({quantity} units available)" if quantity > 0 else ""),
+            "stock_info": api_result
+        }, "check_stock"
+
+    async def _h_price_inquiry(self, entities, msg_lower):
+        api_result = await self.call_api("get_price", filters=entities)
+        
+        if 'error' in api_result:
+            return {
+                "type": "error",
+                "content": f"Sorry, I couldn't get price information: {api_result['error']}"
+            }, "get_price"
+        
+        price = api_result.get('price', 0)
+        product_name = api_result.get('product', {}).get('name', 'Product')
+        
+        return {
+            "type": "price",
+            "content": f"{product_name}: ৳{price}",
+            "price_info": api_result
+        }, "get_price"
+
+    async def _h_order_status(self, entities, msg_lower):
+        if 'orderNumber' in entities:
+            api_result = await self.call_api("track_order", filters=entities)
+            return self._order_reply(api_result), "track_order"
+        elif 'phoneNumber' in entities:
+            api_result = await self.call_api("get_orders_by_phone", filters=entities)
+            return self._order_reply(api_result), "get_orders_by_phone"
+        
+        return {
+            "type": "text",
+            "content": "Please provide your order number or phone number to track your order."
+        }, "request_order_info"
+
+    async def _h_provide_phone_number(self, entities, msg_lower):
+        if 'phoneNumber' not in entities:
+            return {
+                "type": "text",
+                "content": "Please provide your phone number to find your orders. Example: 01712345678"
+            }, "request_phone_number"
+        
+        api_result = await self.call_api("get_orders_by_phone", filters=entities)
+        return self._order_reply(api_result), "get_orders_by_phone"
+
+    async def _h_show_variants(self, entities, msg_lower):
+        # Determine specific variant action based on entities and keywords
+        has = {keyword: keyword in msg_lower for keyword in _VARIANT_KEYWORDS}
+        if entities.get('color') and entities.get('size'):
+            action = "check_variant_availability"
+        elif has['color'] and has['size']:
+            action = "show_all_variants"
+        elif has['color']:
+            action = "show_color_options"
+        elif has['size'] or has['chart']:
+            action = "show_size_chart"
+        elif has['compare'] or has['difference']:
+            action = "compare_variants"
+        else:
+            action = "show_product_variants"
+        
+        # For variants, we'd need to get product details first
+        search_result = await self.call_api("search_product", filters=entities)
+        
+        if 'error' in search_result or not search_result.get('products'):
+            return {
+                "type": "text",
+                "content": "Please search for a specific product first to see variants."
+            }, action
+        
+        product = search_result['products'][0]
+        variants = product.get('variation', [])
+        
+        if variants:
+            return {
+                "type": "variants",
+                "content": f"Available variants for {product.get('name', 'this product')}:",
+                "variants": variants
+            }, action
+        
+        return {
+            "type": "text",
+            "content": f"{product.get('name', 'This product')} doesn't have variants."
+        }, action
+
+    async def _h_general(self, entities, msg_lower):
+        return {
+            "type": "text",
+            "content": "I'm here to help! I can search products, check stock, provide pricing information, and track orders. What would you like to know?"
+        }, "provide_help"
+
+    async def process_message(self, message, session_id="default"):
         """Main processing function that combines intent prediction with tool calling"""
         try:
+            # Normalize once and share it with intent prediction, entity
+            # extraction and the handler
+            msg_lower = message.strip().lower()
+            
             # Predict intent
-            intent, confidence = self.predict_intent(message)
+            intent, confidence = await self.predict_intent(message, msg_lower)
             
             # Extract entities
-            entities = self.extract_entities(message)
+            entities = self.extract_entities(message, msg_lower)
             
-            # Initialize response structure
-            response = {
+            # Handle the intent, calling the backend API where needed
+            handler = self._handlers.get(intent, self._h_general)
+            reply, action = await handler(entities, msg_lower)
+            
+            return {
                 "intent": intent,
                 "confidence": confidence,
                 "entities": entities,
                 "message": message,
                 "timestamp": datetime.now().isoformat(),
                 "session_id": session_id,
-                "action": None
+                "action": action,
+                "response": reply,
+                # Generate contextual suggestions for all responses
+                "suggestions": await self.generate_suggestions(intent, entities, action, reply, message)
             }
             
-            # Handle different intents with API calls
-            if intent == "greeting":
-                response["action"] = "greet_user"
-                response["response"] = {
-                    "type": "text",
-                    "content": "Hello! I'm your shopping assistant. I can help you with product searches, stock availability, price inquiries, order tracking, and product variants. How can I help you today?"
-                }
-                
-            elif intent == "product_search":
-                response["action"] = "search_product"
-                # Call search API
-                api_result = self.call_api("search_product", filters=entities)
-                
-                if 'error' in api_result:
-                    response["response"] = {
-                        "type": "error",
-                        "content": f"Sorry, I couldn't search for products: {api_result['error']}"
-                    }
-                else:
-                    products = api_result.get('products', [])
-                    if products:
-                        response["response"] = {
-                            "type": "products",
-                            "content": f"Found {len(products)} product(s):",
-                            "products": products[:3]  # Limit to 3 results
-                        }
-                    else:
-                        response["action"] = "no_products_found"
-                        response["response"] = {
-                            "type": "text",
-                            "content": "No products found matching your search. Try different keywords or browse our categories."
-                        }
-                        
-            elif intent == "stock_inquiry":
-                response["action"] = "check_stock"
-                # Call stock check API
-                api_result = self.call_api("check_stock", filters=entities)
-                
-                if 'error' in api_result:
-                    response["response"] = {
-                        "type": "error",
-                        "content": f"Sorry, I couldn't check stock: {api_result['error']}"
-                    }
-                else:
-                    stock_status = "✅ In Stock" if api_result.get('in_stock') else "❌ Out of Stock"
-                    quantity = api_result.get('quantity', 0)
-                    product_name = api_result.get('product', {}).get('name', 'Product')
-                    
-                    response["response"] = {
-                        "type": "stock",
-                        "content": f"{product_name}: {stock_status}" + (f" ({quantity} units available)" if quantity > 0 else ""),
-                        "stock_info": api_result
-                    }
-                    
-            elif intent == "price_inquiry":
-                response["action"] = "get_price"
-                # Call price API
-                api_result = self.call_api("get_price", filters=entities)
-                
-                if 'error' in api_result:
-                    response["response"] = {
-                        "type": "error",
-                        "content": f"Sorry, I couldn't get price information: {api_result['error']}"
-                    }
-                else:
-                    price = api_result.get('price', 0)
-                    product_name = api_result.get('product', {}).get('name', 'Product')
-                    
-                    response["response"] = {
-                        "type": "price",
-                        "content": f"{product_name}: ৳{price}",
-                        "price_info": api_result
-                    }
-                    
-            elif intent == "order_status":
-                # Handle order tracking
-                if 'orderNumber' in entities:
-                    response["action"] = "track_order"
-                    api_result = self.call_api("track_order", filters=entities)
-                elif 'phoneNumber' in entities:
-                    response["action"] = "get_orders_by_phone"
-                    api_result = self.call_api("get_orders_by_phone", filters=entities)
-                else:
-                    response["action"] = "request_order_info"
-                    response["response"] = {
-                        "type": "text",
-                        "content": "Please provide your order number or phone number to track your order."
-                    }
-                    # Generate suggestions and return
-                    response["suggestions"] = self.generate_suggestions(intent, entities, response["action"])
-                    return response
-                    
-            elif intent == "provide_phone_number":
-                # Handle phone number provision for order lookup
-                if 'phoneNumber' in entities:
-                    response["action"] = "get_orders_by_phone"
-                    api_result = self.call_api("get_orders_by_phone", filters=entities)
-                else:
-                    response["action"] = "request_phone_number"
-                    response["response"] = {
-                        "type": "text",
-                        "content": "Please provide your phone number to find your orders. Example: 01712345678"
-                    }
-                    # Generate suggestions and return
-                    response["suggestions"] = self.generate_suggestions(intent, entities, response["action"])
-                    return response
-                
-                if 'error' in api_result:
-                    response["response"] = {
-                        "type": "error",
-                        "content": f"Sorry, I couldn't track your order: {api_result['error']}"
-                    }
-                else:
-                    response["response"] = {
-                        "type": "order",
-                        "content": "Here's your order information:",
-                        "order_data": api_result
-                    }
-                    
-            elif intent == "show_variants":
-                # Determine specific variant action based on entities
-                if entities.get('color') and entities.get('size'):
-                    response["action"] = "check_variant_availability"
-                elif 'color' in message.lower() and 'size' in message.lower():
-                    response["action"] = "show_all_variants"
-                elif 'color' in message.lower():
-                    response["action"] = "show_color_options"
-                elif 'size' in message.lower() or 'chart' in message.lower():
-                    response["action"] = "show_size_chart"
-                elif 'compare' in message.lower() or 'difference' in message.lower():
-                    response["action"] = "compare_variants"
-                else:
-                    response["action"] = "show_product_variants"
-                
-                # For variants, we'd need to get product details first
-                search_result = self.call_api("search_product", filters=entities)
-                
-                if 'error' in search_result or not search_result.get('products'):
-                    response["response"] = {
-                        "type": "text",
-                        "content": "Please search for a specific product first to see variants."
-                    }
-                else:
-                    product = search_result['products'][0]
-                    variants = product.get('variation', [])
-                    
-                    if variants:
-                        response["response"] = {
-                            "type": "variants",
-                            "content": f"Available variants for {product.get('name', 'this product')}:",
-                            "variants": variants
-                        }
-                    else:
-                        response["response"] = {
-                            "type": "text",
-                            "content": f"{product.get('name', 'This product')} doesn't have variants."
-                        }
-                        
-            else:  # general intent
-                response["action"] = "provide_help"
-                response["response"] = {
-                    "type": "text",
-                    "content": "I'm here to help! I can search products, check stock, provide pricing information, and track orders. What would you like to know?"
-                }
-            
-            # Generate contextual suggestions for all responses
-            response["suggestions"] = self.generate_suggestions(intent, entities, response.get("action"), response.get("response"), message)
-            
-            return response
-            
         except Exception as e:
             return {
                 "intent": "general",
@@ -715,32 +941,50 @@ class NLPService:
             }
 
 # Initialize the NLP service
-nlp_service = NLPService()
+nlp_service = NLPService(
+    use_hashing=os.getenv('SUGGESTION_USE_HASHING') == '1',
+    quantize_weights=os.getenv('INTENT_FLOAT_WEIGHTS') != '1'
+)
+
+def json_response(payload, status=200):
+    """Serialize a response body with orjson, which is C-implemented and returns bytes directly"""
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return app.response_class(body, status=status, mimetype='application/json')
+
+@app.before_serving
+async def open_http_client():
+    """Open the shared HTTP client once the event loop is running"""
+    await nlp_service.start()
+
+@app.after_serving
+async def close_http_client():
+    """Release pooled backend connections on shutdown"""
+    await nlp_service.close()
 
 @app.route('/predict', methods=['POST'])
-def predict():
+async def predict():
     """API endpoint for intent prediction and processing"""
     try:
-        data = request.get_json()
+        data = await request.get_json()
         
         if not data or 'message' not in data:
-            return jsonify({"error": "Message is required"}), 400
+            return json_response({"error": "Message is required"}, 400)
         
         message = data['message']
         session_id = data.get('session_id', 'default')
         
         # Process the message
-        result = nlp_service.process_message(message, session_id)
+        result = await nlp_service.process_message(message, session_id)
         
-        return jsonify(result)
+        return json_response(result)
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
 
 @app.route('/health', methods=['GET'])
-def health():
+async def health():
     """Health check endpoint"""
-    return jsonify({
+    return json_response({
         "status": "healthy",
         "service": "NLP Service",
         "timestamp": datetime.now().isoformat()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Re-save trained model artifacts for the NLP service
+Writes the pickled models and vectorizers back out with joblib (uncompressed)
+so the services can memory-map their arrays instead of copying them per worker
+"""
+
+import os
+import sys
+import joblib
+
+DEFAULT_ARTIFACTS = ['model.pkl', 'vectorizer.pkl']
+
+# Used by nlp_service_v2.py only, so they are skipped when not present
+OPTIONAL_ARTIFACTS = ['suggestion_model.pkl', 'suggestion_vectorizer.pkl', 'suggestion_binarizer.pkl']
+
+def resave(path):
+    """Load an artifact and write it back in place as an uncompressed joblib file"""
+    obj = joblib.load(path)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(obj, tmp_path, compress=0)
+    # Replace atomically so running workers keep their existing mapping
+    os.replace(tmp_path, path)
+
+if __name__ == '__main__':
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = sys.argv[1:] or [os.path.join(script_dir, name) for name in DEFAULT_ARTIFACTS] + [
+        path for path in (os.path.join(script_dir, name) for name in OPTIONAL_ARTIFACTS)
+        if os.path.exists(path)
+    ]
+    
+    for path in paths:
+        resave(path)
+        print(f"✅ Re-saved {path}")
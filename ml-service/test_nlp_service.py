@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the NLP services, run against a tiny intent model fitted on the fly
+Run from ml-service/ with: python -m unittest test_nlp_service
+"""
+
+import asyncio
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import joblib
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+import train_suggestions
+
+TRAINING_EXAMPLES = [
+    ("hello", "greeting"),
+    ("hi there", "greeting"),
+    ("search for women shoes", "product_search"),
+    ("is SS122 in stock", "stock_inquiry"),
+    ("price of SS122", "price_inquiry"),
+    ("track my order", "order_status"),
+    ("where is my parcel", "order_status"),
+    ("show colors for SS122", "show_variants"),
+    ("what can you do", "general"),
+]
+
+
+def load_service_module(model_dir, filename):
+    """Fit a tiny model into model_dir and import the service module from there
+
+    The services load model.pkl/vectorizer.pkl at import time, nlp_service.py next
+    to its own file and nlp_service_v2.py from the working directory, so a copy of
+    the module is imported from model_dir with model_dir as the working directory
+    """
+    texts, intents = zip(*TRAINING_EXAMPLES)
+    vectorizer = TfidfVectorizer()
+    classifier = LogisticRegression(max_iter=1000).fit(vectorizer.fit_transform(texts), intents)
+    joblib.dump(classifier, os.path.join(model_dir, 'model.pkl'))
+    joblib.dump(vectorizer, os.path.join(model_dir, 'vectorizer.pkl'))
+
+    module_path = os.path.join(model_dir, filename)
+    shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename), module_path)
+    spec = importlib.util.spec_from_file_location(filename[:-3] + '_under_test', module_path)
+    module = importlib.util.module_from_spec(spec)
+    cwd = os.getcwd()
+    os.chdir(model_dir)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+class ProcessMessageTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model_dir = tempfile.mkdtemp()
+        cls.service = load_service_module(cls.model_dir, 'nlp_service.py').nlp_service
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.model_dir, ignore_errors=True)
+
+    def test_greeting_has_suggestions(self):
+        result = asyncio.run(self.service.process_message("hello"))
+
+        self.assertEqual(result['intent'], 'greeting')
+        self.assertTrue(result['suggestions'])
+
+
+class MicroBatcherTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model_dir = tempfile.mkdtemp()
+        cls.module = load_service_module(cls.model_dir, 'nlp_service_v2.py')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.model_dir, ignore_errors=True)
+
+    def test_cancelled_future_does_not_stop_batcher(self):
+        release = threading.Event()
+
+        def echo(items):
+            release.wait(timeout=5)
+            return items
+
+        batcher = self.module.MicroBatcher({"echo": echo})
+        abandoned = batcher.submit("echo", "a")
+        kept = batcher.submit("echo", "b")
+        abandoned.cancel()
+        release.set()
+
+        self.assertEqual(kept.result(timeout=5), "b")
+        self.assertEqual(batcher.submit("echo", "c").result(timeout=5), "c")
+        self.assertTrue(batcher._thread.is_alive())
+
+    def test_cancelled_request_does_not_fail_its_batch(self):
+        service = self.module.nlp_service
+        score_intents = service._batcher._batch_functions["intent"]
+
+        def slow_score_intents(texts):
+            threading.Event().wait(0.1)
+            return score_intents(texts)
+
+        service._batcher = self.module.MicroBatcher({"intent": slow_score_intents})
+
+        async def predict_with_one_cancelled():
+            abandoned = asyncio.create_task(service.predict_intent("where is my parcel now"))
+            kept = asyncio.create_task(service.predict_intent("where is my parcel today"))
+            await asyncio.sleep(0.02)
+            abandoned.cancel()
+            return await kept
+
+        intent, confidence = asyncio.run(predict_with_one_cancelled())
+
+        self.assertEqual(intent, 'order_status')
+        self.assertGreater(confidence, 0.0)
+        self.assertTrue(service._batcher._thread.is_alive())
+
+
+class HashingSuggestionsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model_dir = tempfile.mkdtemp()
+        cls.module = load_service_module(cls.model_dir, 'nlp_service_v2.py')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.model_dir, ignore_errors=True)
+
+    def test_hashing_params_match_trainer(self):
+        self.assertEqual(self.module._SUGGESTION_HASHING_PARAMS, train_suggestions.HASHING_PARAMS)
+
+    def test_trained_suggestions_are_used(self):
+        service = self.module.nlp_service
+
+        def context_string(intent, message):
+            context = service._create_context_for_suggestions(intent, {}, None, message)
+            return service._create_context_string_for_suggestions(context)
+
+        components = train_suggestions.train(
+            [context_string("greeting", "hello"), context_string("order_status", "track my order")],
+            [["Show me products"], ["Check my order"]]
+        )
+        paths = {}
+        for name, component in zip(('vectorizer', 'model', 'binarizer'), components):
+            paths[f'suggestion_{name}_path'] = os.path.join(self.model_dir, f'hashed_{name}.pkl')
+            joblib.dump(component, paths[f'suggestion_{name}_path'])
+        hashing_service = self.module.NLPService(
+            model_path=os.path.join(self.model_dir, 'model.pkl'),
+            vectorizer_path=os.path.join(self.model_dir, 'vectorizer.pkl'),
+            use_hashing=True, **paths
+        )
+
+        suggestions = asyncio.run(hashing_service.generate_suggestions("greeting", {}, last_message="hello"))
+
+        self.assertTrue(hashing_service.intelligent_suggestions_enabled)
+        self.assertEqual(suggestions, ["Show me products"])
+
+
+if __name__ == '__main__':
+    unittest.main()
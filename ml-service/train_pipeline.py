@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Train the intent classifier as a hashing pipeline
+HashingVectorizer -> TfidfTransformer -> LogisticRegression, saved as pipeline.pkl.
+The NLP service prefers pipeline.pkl over model.pkl/vectorizer.pkl when it exists.
+
+Usage: python train_pipeline.py intents.csv   (CSV columns: text,intent)
+"""
+
+import csv
+import os
+import sys
+import joblib
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+def build_pipeline():
+    """Unfitted intent pipeline; the hashing step is stateless, so only idf weights are learned"""
+    return Pipeline([
+        # Same default regex tokenizer and lowercasing as the previous TfidfVectorizer;
+        # normalization is left to the TF-IDF step
+        ('hashing', HashingVectorizer(n_features=2**18, alternate_sign=False, norm=None, ngram_range=(1, 2))),
+        ('tfidf', TfidfTransformer()),
+        ('classifier', LogisticRegression(max_iter=1000)),
+    ])
+
+def load_examples(path):
+    """Read (text, intent) pairs from a CSV file with a header row"""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    return [row['text'] for row in rows], [row['intent'] for row in rows]
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python train_pipeline.py intents.csv")
+        sys.exit(1)
+    
+    texts, intents = load_examples(sys.argv[1])
+    pipeline = build_pipeline().fit(texts, intents)
+    
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    output_path = os.path.join(script_dir, 'pipeline.pkl')
+    # Uncompressed so the service can memory-map the classifier arrays
+    joblib.dump(pipeline, output_path, compress=0)
+    print(f"✅ Trained on {len(texts)} examples, saved {output_path}")
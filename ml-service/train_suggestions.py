@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Train the suggestion model on hashed context features for nlp_service_v2.py
+HashingVectorizer -> TfidfTransformer -> one-vs-rest LogisticRegression. Only the
+TfidfTransformer is saved as suggestion_vectorizer.pkl; the service adds the
+hashing step itself when started with SUGGESTION_USE_HASHING=1.
+
+Usage: python train_suggestions.py suggestions.csv
+  CSV columns: context,suggestions
+  context is the context string the service builds for a turn
+  ("intent_price_inquiry stage_price_checked has_product_code ..."), suggestions
+  are the follow-up phrases for it separated by "|"
+"""
+
+import csv
+import os
+import sys
+import joblib
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.preprocessing import MultiLabelBinarizer
+
+# Must match _SUGGESTION_HASHING_PARAMS in nlp_service_v2.py
+HASHING_PARAMS = dict(n_features=2**15, alternate_sign=False, norm=None)
+
+def train(contexts, suggestion_lists):
+    """Fit the (tfidf, model, binarizer) suggestion components on hashed contexts"""
+    binarizer = MultiLabelBinarizer()
+    y = binarizer.fit_transform(suggestion_lists)
+
+    # The hashing step is stateless, so only the idf weights are learned
+    tfidf = TfidfTransformer()
+    X = tfidf.fit_transform(HashingVectorizer(**HASHING_PARAMS).transform(contexts))
+    model = OneVsRestClassifier(LogisticRegression(max_iter=1000)).fit(X, y)
+    return tfidf, model, binarizer
+
+def load_examples(path):
+    """Read (context, [suggestion, ...]) pairs from a CSV file with a header row"""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    suggestion_lists = [[s.strip() for s in row['suggestions'].split('|') if s.strip()] for row in rows]
+    return [row['context'] for row in rows], suggestion_lists
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python train_suggestions.py suggestions.csv")
+        sys.exit(1)
+
+    contexts, suggestion_lists = load_examples(sys.argv[1])
+    components = train(contexts, suggestion_lists)
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    for name, component in zip(('suggestion_vectorizer', 'suggestion_model', 'suggestion_binarizer'), components):
+        output_path = os.path.join(script_dir, f'{name}.pkl')
+        # Uncompressed so the service can memory-map the arrays
+        joblib.dump(component, output_path, compress=0)
+    print(f"✅ Trained on {len(contexts)} examples, saved suggestion_*.pkl to {script_dir}")
@@ -112,7 +112,7 @@ class ServiceManager {
 
   async checkRequiredFiles() {
     const mlServicePath = path.join(process.cwd(), 'ml-service');
-    const requiredFiles = ['nlp_service.py', 'model.pkl', 'vectorizer.pkl', 'requirements.txt'];
+    const requiredFiles = ['nlp_service.py', 'gunicorn.conf.py', 'model.pkl', 'vectorizer.pkl', 'requirements.txt'];
     const missingFiles = [];
 
     for (const file of requiredFiles) {
@@ -149,8 +149,8 @@ class ServiceManager {
       // Wait a bit for Express server to start
       await new Promise(resolve => setTimeout(resolve, 2000));
 
-      // Start ML service
-      await this.startService('ml-service', 'ml-service/ml-env/bin/python', ['ml-service/nlp_service.py'], {
+      // Start ML service under gunicorn (preloaded model, one event loop per worker)
+      await this.startService('ml-service', 'ml-service/ml-env/bin/gunicorn', ['-c', 'ml-service/gunicorn.conf.py', 'nlp_service:app'], {
         env: { 
           ML_SERVICE_PORT: mlPort,
           API_BASE_URL: `http://localhost:${expressPort}/api`